@@ -1,5 +1,4 @@
-from PIL import Image
-from django.forms import ModelChoiceField, ModelForm, ValidationError
+from django.forms import ModelChoiceField, ModelForm
 from django.contrib import admin
 from django.utils.safestring import mark_safe
 
@@ -32,19 +31,6 @@ class NotebookAdminForm(ModelForm):
             )
         )
 
-    def clean_image(self):
-        image = self.cleaned_data['image']
-        img = Image.open(image)
-        min_height, min_width = Product.MIN_RESOLUTION
-        max_height, max_width = Product.MAX_RESOLUTION
-        if image.size > Product.MAX_IMAGE_SIZE:
-            raise ValidationError('Размер фото не должен превышать 3 МВ!')
-        if img.height < min_height or img.width < min_width:
-            raise ValidationError('Разрешение фото меньше минимального')
-        if img.height > max_height or img.width > max_width:
-            raise ValidationError('Разрешение фото больше максимального')
-        return image
-
 
 class NotebookAdmin(admin.ModelAdmin):
 
@@ -67,10 +53,16 @@ class SmartphoneAdmin(admin.ModelAdmin):
         return super().formfield_for_foreignkey(db_field, request, **kwargs)
 
 
+class CartProductAdmin(admin.ModelAdmin):
+
+    def get_queryset(self, request):
+        return super().get_queryset(request).with_content_objects()
+
+
 admin.site.register(Category)
 admin.site.register(Notebook, NotebookAdmin)
 admin.site.register(Smartphone, SmartphoneAdmin)
-admin.site.register(CartProduct)
+admin.site.register(CartProduct, CartProductAdmin)
 admin.site.register(Cart)
 admin.site.register(Customer)
 admin.site.register(Order)
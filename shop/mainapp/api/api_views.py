@@ -1,27 +1,94 @@
+from django.core.exceptions import FieldDoesNotExist
 from rest_framework.generics import ListAPIView
-from rest_framework.filters import SearchFilter
+from rest_framework.filters import OrderingFilter, SearchFilter
+from rest_framework.relations import ManyRelatedField, RelatedField
+from rest_framework.response import Response
+from rest_framework.serializers import BaseSerializer, ListSerializer
 
+from .pagination import ProductPagination
 from .serializers import CategorySerializer, SmartphoneSerializer, NotebookSerializer
 from ..models import Category, Smartphone, Notebook
 
 
+def get_source_relation(model, source_attrs):
+    """Return the ``__`` lookup of the relations a dotted source walks through and whether any is to-many."""
+    path, many = [], False
+    for attr in source_attrs:
+        try:
+            model_field = model._meta.get_field(attr)
+        except FieldDoesNotExist:
+            break
+        if model_field.related_model is None:
+            break
+        path.append(attr)
+        many = many or model_field.one_to_many or model_field.many_to_many
+        model = model_field.related_model
+    return '__'.join(path), many
+
+
+class SerializerRelatedQuerysetMixin:
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        select_related, prefetch_related = [], []
+        for field in self.get_serializer().fields.values():
+            if field.source == '*':
+                continue
+            if '.' in field.source:
+                lookup, many = get_source_relation(queryset.model, field.source_attrs[:-1])
+                if lookup:
+                    (prefetch_related if many else select_related).append(lookup)
+                continue
+            if isinstance(field, (ManyRelatedField, ListSerializer)):
+                prefetch_related.append(field.source)
+            elif isinstance(field, BaseSerializer) or (
+                isinstance(field, RelatedField) and not field.use_pk_only_optimization()
+            ):
+                select_related.append(field.source)
+        if select_related:
+            queryset = queryset.select_related(*select_related)
+        if prefetch_related:
+            queryset = queryset.prefetch_related(*prefetch_related)
+        return queryset
+
+
+class AnnotatedListMixin:
+
+    def annotate_queryset(self, queryset):
+        return queryset
+
+    def list(self, request, *args, **kwargs):
+        queryset = self.filter_queryset(self.get_queryset())
+        page = self.paginate_queryset(queryset)
+        if page is not None:
+            return self.get_paginated_response(self.get_serializer(page, many=True).data)
+        return Response(self.get_serializer(self.annotate_queryset(queryset), many=True).data)
+
+
 class CategoryListAPIView(ListAPIView):
 
     serializer_class = CategorySerializer
     queryset = Category.objects.all()
 
 
-class SmartphoneListAPIView(ListAPIView):
+class SmartphoneListAPIView(AnnotatedListMixin, SerializerRelatedQuerysetMixin, ListAPIView):
 
     serializer_class = SmartphoneSerializer
-    queryset = Smartphone.objects.all()
-    filter_backends = [SearchFilter]
+    queryset = Smartphone.objects.order_by('-id')
+    filter_backends = [SearchFilter, OrderingFilter]
     search_fields = ['price', 'title']
+    ordering_fields = [
+        'price', 'diagonal_inch', 'accum_volume_mah', 'ram_gb', 'sd_volume_gb', 'main_cam_mp',
+        'front_cam_mp'
+    ]
+    pagination_class = ProductPagination
 
 
-class NotebookListAPIView(ListAPIView):
+class NotebookListAPIView(AnnotatedListMixin, SerializerRelatedQuerysetMixin, ListAPIView):
     serializer_class = NotebookSerializer
-    queryset = Notebook.objects.all()
-    filter_backends = [SearchFilter]
+    queryset = Notebook.objects.order_by('-id')
+    filter_backends = [SearchFilter, OrderingFilter]
     search_fields = ['price', 'title']
+    ordering_fields = ['price', 'diagonal_inch', 'processor_freq_ghz', 'ram_gb']
+    pagination_class = ProductPagination
 
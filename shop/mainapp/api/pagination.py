@@ -0,0 +1,29 @@
+from functools import partial
+
+from django.core.paginator import Paginator
+from rest_framework.pagination import PageNumberPagination
+
+
+class AnnotatedPagePaginator(Paginator):
+
+    def __init__(self, object_list, per_page, annotate=None, **kwargs):
+        super().__init__(object_list, per_page, **kwargs)
+        self.annotate = annotate
+
+    def _get_page(self, object_list, *args, **kwargs):
+        # Only the sliced page is annotated, so count() runs on the plain filtered queryset
+        if self.annotate is not None:
+            object_list = self.annotate(object_list)
+        return super()._get_page(object_list, *args, **kwargs)
+
+
+class ProductPagination(PageNumberPagination):
+
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.django_paginator_class = partial(
+            AnnotatedPagePaginator, annotate=getattr(view, 'annotate_queryset', None)
+        )
+        return super().paginate_queryset(queryset, request, view)
@@ -0,0 +1,32 @@
+# Generated by Django 3.1.14 on 2026-10-14 03:23
+
+from django.db import migrations, models
+
+
+def fill_cart_product_price(apps, schema_editor):
+    CartProduct = apps.get_model('mainapp', 'CartProduct')
+    for cart_product in CartProduct.objects.select_related('content_type'):
+        model = apps.get_model(cart_product.content_type.app_label, cart_product.content_type.model)
+        product = model.objects.filter(pk=cart_product.object_id).only('price').first()
+        if product is None:
+            # The product is gone, so the line item can neither be priced nor bought
+            cart_product.delete()
+        else:
+            cart_product.price = product.price
+            cart_product.save(update_fields=['price'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('mainapp', '0016_delete_sliders'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='cartproduct',
+            name='price',
+            field=models.DecimalField(blank=True, decimal_places=2, max_digits=9, null=True, verbose_name='Цена'),
+        ),
+        migrations.RunPython(fill_cart_product_price, migrations.RunPython.noop),
+    ]
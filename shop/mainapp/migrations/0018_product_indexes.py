@@ -0,0 +1,29 @@
+# Generated by Django 3.1.14 on 2026-10-14 03:24
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('mainapp', '0017_cartproduct_price'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='cartproduct',
+            index=models.Index(fields=['content_type', 'object_id'], name='mainapp_car_content_89975a_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='cartproduct',
+            index=models.Index(fields=['cart', 'user'], name='mainapp_car_cart_id_4d4a15_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='notebook',
+            index=models.Index(fields=['category', '-id'], name='mainapp_not_categor_68f6f2_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='smartphone',
+            index=models.Index(fields=['category', '-id'], name='mainapp_sma_categor_26f171_idx'),
+        ),
+    ]
@@ -0,0 +1,142 @@
+# Generated by Django 3.1.14 on 2026-10-14 03:26
+
+import re
+from decimal import Decimal, InvalidOperation, ROUND_HALF_UP
+
+from django.core.exceptions import ValidationError
+from django.db import migrations, models
+
+
+# Copied from mainapp.utils so the backfill keeps parsing the way it did when this migration was written
+GIGABYTE_UNITS = {'гб': 1, 'gb': 1, 'тб': 1024, 'tb': 1024}
+GIGAHERTZ_UNITS = {'ггц': 1, 'ghz': 1, 'мгц': Decimal('0.001'), 'mhz': Decimal('0.001')}
+INCH_UNITS = {'"': 1, '″': 1, 'дюйм': 1, 'inch': 1}
+MILLIAMPERE_HOUR_UNITS = {'мач': 1, 'mah': 1}
+MEGAPIXEL_UNITS = {'мп': 1, 'mp': 1}
+
+NUMBER = r'(?<![\d.,])(\d+(?:[.,]\d+)?)'
+BARE_NUMBER_RE = re.compile(r'\s*' + NUMBER + r'\s*$')
+
+
+def to_decimal(number):
+    return Decimal(number.replace(',', '.'))
+
+
+def parse_number(value, units):
+    if not value:
+        return None
+    unit_pattern = '|'.join(re.escape(unit) for unit in sorted(units, key=len, reverse=True))
+    match = re.search(NUMBER + r'\s*(' + unit_pattern + ')', value, re.IGNORECASE)
+    if match is not None:
+        return to_decimal(match.group(1)) * units[match.group(2).lower()]
+    match = BARE_NUMBER_RE.match(value)
+    if match is not None:
+        return to_decimal(match.group(1))
+    return None
+
+
+def to_field_value(field, value):
+    if value is None:
+        return None
+    try:
+        if isinstance(field, models.DecimalField):
+            value = value.quantize(Decimal(1).scaleb(-field.decimal_places))
+        else:
+            value = value.to_integral_value(ROUND_HALF_UP)
+        value = field.to_python(value)
+        field.run_validators(value)
+    except (InvalidOperation, ValidationError):
+        return None
+    return value
+
+
+NUMERIC_SPEC_FIELDS = {
+    'Notebook': {
+        'diagonal_inch': ('diagonal', INCH_UNITS),
+        'processor_freq_ghz': ('processor_freq', GIGAHERTZ_UNITS),
+        'ram_gb': ('ram', GIGABYTE_UNITS),
+    },
+    'Smartphone': {
+        'diagonal_inch': ('diagonal', INCH_UNITS),
+        'accum_volume_mah': ('accum_volume', MILLIAMPERE_HOUR_UNITS),
+        'ram_gb': ('ram', GIGABYTE_UNITS),
+        'sd_volume_gb': ('sd_volume', GIGABYTE_UNITS),
+        'main_cam_mp': ('main_cam', MEGAPIXEL_UNITS),
+        'front_cam_mp': ('front_cam', MEGAPIXEL_UNITS),
+    },
+}
+
+
+def fill_numeric_specs(apps, schema_editor):
+    for model_name, fields in NUMERIC_SPEC_FIELDS.items():
+        model = apps.get_model('mainapp', model_name)
+        products = list(model.objects.all())
+        for product in products:
+            for numeric_field, (source_field, units) in fields.items():
+                value = parse_number(getattr(product, source_field), units)
+                setattr(product, numeric_field, to_field_value(model._meta.get_field(numeric_field), value))
+        model.objects.bulk_update(products, list(fields))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('mainapp', '0018_product_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='notebook',
+            name='diagonal_inch',
+            field=models.DecimalField(decimal_places=1, editable=False, max_digits=4, null=True, verbose_name='Диагональ (дюймы)'),
+        ),
+        migrations.AddField(
+            model_name='notebook',
+            name='processor_freq_ghz',
+            field=models.DecimalField(decimal_places=2, editable=False, max_digits=4, null=True, verbose_name='Частота процессора (ГГц)'),
+        ),
+        migrations.AddField(
+            model_name='notebook',
+            name='ram_gb',
+            field=models.PositiveSmallIntegerField(editable=False, null=True, verbose_name='Оперативная память (ГБ)'),
+        ),
+        migrations.AddField(
+            model_name='smartphone',
+            name='accum_volume_mah',
+            field=models.PositiveIntegerField(editable=False, null=True, verbose_name='Объем батареи (мАч)'),
+        ),
+        migrations.AddField(
+            model_name='smartphone',
+            name='diagonal_inch',
+            field=models.DecimalField(decimal_places=1, editable=False, max_digits=4, null=True, verbose_name='Диагональ (дюймы)'),
+        ),
+        migrations.AddField(
+            model_name='smartphone',
+            name='front_cam_mp',
+            field=models.PositiveSmallIntegerField(editable=False, null=True, verbose_name='Фронтальная камера (МП)'),
+        ),
+        migrations.AddField(
+            model_name='smartphone',
+            name='main_cam_mp',
+            field=models.PositiveSmallIntegerField(editable=False, null=True, verbose_name='Передняя камера (МП)'),
+        ),
+        migrations.AddField(
+            model_name='smartphone',
+            name='ram_gb',
+            field=models.PositiveSmallIntegerField(editable=False, null=True, verbose_name='Оперативная память (ГБ)'),
+        ),
+        migrations.AddField(
+            model_name='smartphone',
+            name='sd_volume_gb',
+            field=models.PositiveIntegerField(editable=False, null=True, verbose_name='Макс. объём встраиваемой памяти (ГБ)'),
+        ),
+        migrations.AddIndex(
+            model_name='notebook',
+            index=models.Index(fields=['ram_gb'], name='mainapp_not_ram_gb_77eb00_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='smartphone',
+            index=models.Index(fields=['ram_gb'], name='mainapp_sma_ram_gb_8a536b_idx'),
+        ),
+        migrations.RunPython(fill_numeric_specs, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,24 @@
+# Generated by Django 3.1.14 on 2026-10-14 03:28
+
+from django.db import migrations, models
+import mainapp.models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('mainapp', '0019_numeric_specs'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='notebook',
+            name='image',
+            field=models.ImageField(blank=True, upload_to='', validators=[mainapp.models.validate_image_resolution], verbose_name='Фото'),
+        ),
+        migrations.AlterField(
+            model_name='smartphone',
+            name='image',
+            field=models.ImageField(blank=True, upload_to='', validators=[mainapp.models.validate_image_resolution], verbose_name='Фото'),
+        ),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 3.1.14 on 2026-10-14 03:29
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('mainapp', '0020_image_validators'),
+    ]
+
+    operations = [
+        migrations.RemoveField(
+            model_name='cart',
+            name='final_price',
+        ),
+        migrations.RemoveField(
+            model_name='cart',
+            name='total_products',
+        ),
+    ]
@@ -1,7 +1,7 @@
 from django.views.generic.detail import SingleObjectMixin
 from django.views.generic import View
 
-from .models import Category, Cart, Customer, Notebook, Smartphone
+from .models import Category, Cart, CartProduct, Customer, Notebook, Smartphone
 
 
 class CategoryDetailMixin(SingleObjectMixin):
@@ -31,12 +31,21 @@ class CartMixin(View):
                 customer = Customer.objects.create(
                     user=request.user
                 )
-            cart = Cart.objects.filter(owner=customer, in_order=False).first()
+            cart = Cart.objects.with_totals().filter(owner=customer, in_order=False).first()
             if not cart:
                 cart = Cart.objects.create(owner=customer)
+                cart.total_products, cart.final_price = 0, 0
         else:
-            cart = Cart.objects.filter(for_anonymous_user=True).first()
+            cart = Cart.objects.with_totals().filter(for_anonymous_user=True).first()
             if not cart:
                 cart = Cart.objects.create(for_anonymous_user=True)
+                cart.total_products, cart.final_price = 0, 0
         self.cart = cart
         return super().dispatch(request, *args, **kwargs)
+
+    def get_cart_products(self):
+        return self.cart.products.with_content_objects()
+
+    def recompute_cart(self):
+        if CartProduct.recompute_cart(self.cart):
+            self.cart = Cart.objects.with_totals().get(pk=self.cart.pk)
@@ -1,11 +1,26 @@
+from datetime import timedelta
+from functools import lru_cache
+from operator import attrgetter
+
 from PIL import Image
+from django.core.cache import cache
+from django.core.exceptions import ValidationError
+from django.core.files.storage import default_storage
+from django.core.files.uploadedfile import UploadedFile
 from django.db import models
+from django.db.models.fields.files import FieldFile
+from django.db.models.functions import Coalesce
 from django.contrib.auth import get_user_model
 from django.contrib.contenttypes.models import ContentType
 from django.contrib.contenttypes.fields import GenericForeignKey
-from django.urls import reverse
+from django.urls import get_script_prefix, reverse
 from django.utils import timezone
 
+from .utils import (
+    GIGABYTE_UNITS, GIGAHERTZ_UNITS, INCH_UNITS, MEGAPIXEL_UNITS, MILLIAMPERE_HOUR_UNITS,
+    parse_number, to_field_value
+)
+
 User = get_user_model()
 
 
@@ -13,35 +28,78 @@ def get_models_get_count(*model_names):
     return [models.Count(model_name) for model_name in model_names]
 
 
-def get_product_url(obj, viewname):
-    ct_model = obj.__class__._meta.model_name
-    return reverse(viewname, kwargs={'ct_model': ct_model, 'slug': obj.slug})
+@lru_cache(maxsize=None)
+def get_product_url_template(viewname, script_prefix):
+    url = reverse(viewname, kwargs={'ct_model': '__ct_model__', 'slug': '__slug__'})
+    return url.replace('%', '%%').replace('__ct_model__', '%(ct_model)s').replace('__slug__', '%(slug)s')
 
 
-class MinResolutionErrorException(Exception):
-    pass
+def build_product_url(viewname, ct_model, slug):
+    url_template = get_product_url_template(viewname, get_script_prefix())
+    return url_template % {'ct_model': ct_model, 'slug': slug}
 
 
-class MaxResolutionErrorException(Exception):
-    pass
+def get_product_url(obj, viewname):
+    return build_product_url(viewname, obj.__class__._meta.model_name, obj.slug)
+
+
+def compile_spec(spec):
+    return tuple((name, field_name, attrgetter(field_name)) for name, field_name in spec)
+
+
+def validate_image_resolution(image):
+    # Images already in storage were checked when they were uploaded, and reading image.file would reopen them
+    if isinstance(image, FieldFile):
+        if not image or image._committed:
+            return
+        image = image.file
+    if not isinstance(image, UploadedFile):
+        return
+    if image.size > Product.MAX_IMAGE_SIZE:
+        raise ValidationError('Размер фото не должен превышать 3 МВ!')
+    with Image.open(image) as img:
+        width, height = img.size
+    image.seek(0)
+    min_height, min_width = Product.MIN_RESOLUTION
+    max_height, max_width = Product.MAX_RESOLUTION
+    if height < min_height or width < min_width:
+        raise ValidationError('Разрешение фото меньше минимального')
+    if height > max_height or width > max_width:
+        raise ValidationError('Разрешение фото больше максимального')
 
 
 class LatestProductsManager:
-    @staticmethod
-    def get_products_for_main_page(*args, **kwargs):
+
+    # Content types do not change while the project is running
+    _ct_models = {}
+
+    @classmethod
+    def get_ct_models(cls, *model_names):
+        missing = [model_name for model_name in model_names if model_name not in cls._ct_models]
+        if missing:
+            cls._ct_models.update((ct.model, ct) for ct in ContentType.objects.filter(model__in=missing))
+        return [cls._ct_models[model_name] for model_name in model_names if model_name in cls._ct_models]
+
+    @classmethod
+    def get_products_for_main_page(cls, *args, **kwargs):
         with_respect_to = kwargs.get('with_respect_to')
-        products = []
-        ct_models = ContentType.objects.filter(model__in=args)
-        for ct_model in ct_models:
-            model_products = ct_model.model_class()._base_manager.all().order_by('-id')[:5]
-            products.extend(model_products)
-        if with_respect_to:
-            ct_model = ContentType.objects.filter(model=with_respect_to)
-            if ct_model.exists():
-                if with_respect_to in args:
-                    return sorted(
-                        products, key=lambda x: x.__class__._meta.model_name.startswith(with_respect_to), reverse=True
-                    )
+        querysets = []
+        for ct_model in cls.get_ct_models(*args):
+            manager = ct_model.model_class()._base_manager
+            latest_ids = manager.order_by('-id').values('id')[:5]
+            querysets.append(manager.filter(id__in=latest_ids).values(
+                'id', 'title', 'slug', 'price', 'image',
+                ct_model=models.Value(ct_model.model, output_field=models.CharField()),
+                priority=models.Value(int(ct_model.model != with_respect_to), output_field=models.IntegerField())
+            ))
+        if not querysets:
+            return []
+        products = list(
+            querysets[0].union(*querysets[1:], all=True).order_by('priority', 'ct_model', '-id')
+        )
+        for product in products:
+            product['url'] = build_product_url('product_detail', product['ct_model'], product['slug'])
+            product['image_url'] = default_storage.url(product['image']) if product['image'] else ''
         return products
 
 
@@ -56,18 +114,32 @@ class CategoryManager(models.Manager):
         'Смартфоны': 'smartphone__count'
     }
 
+    SIDEBAR_CACHE_KEY = 'sidebar_categories_v1'
+
     def get_queryset(self):
         return super().get_queryset()
 
     def get_categories_for_left_sidebar(self):
-        models = get_models_get_count('notebook', 'smartphone')
-        qs = list(self.get_queryset().annotate(*models))
-        data = [
-            dict(name=c.name, url=c.get_absolute_url(), count=getattr(c, self.CATEGORY_NAME_COUNT_NAME[c.name]))
-            for c in qs
-        ]
+        data = cache.get(self.SIDEBAR_CACHE_KEY)
+        if data is None:
+            models = get_models_get_count('notebook', 'smartphone')
+            qs = self.get_queryset().annotate(*models).values(
+                'name', 'slug', 'notebook__count', 'smartphone__count'
+            )
+            data = [
+                dict(
+                    name=c['name'],
+                    url=reverse('category_detail', kwargs={'slug': c['slug']}),
+                    count=c[self.CATEGORY_NAME_COUNT_NAME[c['name']]]
+                )
+                for c in qs
+            ]
+            cache.set(self.SIDEBAR_CACHE_KEY, data)
         return data
 
+    def invalidate_left_sidebar(self):
+        cache.delete(self.SIDEBAR_CACHE_KEY)
+
 
 class Category(models.Model):
     name = models.CharField(max_length=255, verbose_name="Имя категории")
@@ -90,6 +162,8 @@ class Product(models.Model):
     MIN_RESOLUTION = (300, 300)
     MAX_RESOLUTION = (2500, 2500)
     MAX_IMAGE_SIZE = 3145728
+    NUMERIC_SPEC_FIELDS = {}
+    SPEC = ()
 
     class Meta:
         abstract = True
@@ -99,7 +173,7 @@ class Product(models.Model):
     category = models.ForeignKey(Category, verbose_name="Категория", on_delete=models.CASCADE)
     title = models.CharField(max_length=255, verbose_name="Название")
     slug = models.SlugField(unique=True, verbose_name="URL")
-    image = models.ImageField(verbose_name="Фото", blank=True)
+    image = models.ImageField(verbose_name="Фото", blank=True, validators=[validate_image_resolution])
     description = models.TextField(verbose_name="Описание", null=True)
     price = models.DecimalField(max_digits=9, decimal_places=2, verbose_name="Цена", blank=True)
 
@@ -109,17 +183,50 @@ class Product(models.Model):
     def get_model_name(self):
         return self.__class__.__name__.lower()
 
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        cls.SPEC_GETTERS = compile_spec(cls.SPEC)
+
+    def get_spec_rows(self, exclude=()):
+        return tuple(
+            (name, getter(self)) for name, field_name, getter in self.SPEC_GETTERS if field_name not in exclude
+        )
+
     def save(self, *args, **kwargs):
-        image = self.image
-        img = Image.open(image)
-        min_height, min_width = self.MIN_RESOLUTION
-        max_height, max_width = self.MAX_RESOLUTION
-        if img.height < min_height or img.width < min_width:
-            raise MinResolutionErrorException('Разрешение фото меньше минимального')
-        if img.height > max_height or img.width > max_width:
-            raise MaxResolutionErrorException('Разрешение фото больше максимального')
+        self.fill_numeric_specs()
         super().save(*args, **kwargs)
 
+    def fill_numeric_specs(self):
+        for numeric_field, (source_field, units) in self.NUMERIC_SPEC_FIELDS.items():
+            value = parse_number(getattr(self, source_field), units)
+            setattr(self, numeric_field, to_field_value(self._meta.get_field(numeric_field), value))
+
+
+class CartProductQuerySet(models.QuerySet):
+
+    def with_content_objects(self):
+        return self.select_related('content_type').prefetch_related('content_object')
+
+    def update_final_prices(self, qty=None, price=None):
+        # SET expressions read the old column values, so new values have to be used as is
+        fields = {}
+        if qty is not None:
+            fields['qty'] = models.Value(qty)
+        if price is not None:
+            fields['price'] = models.Value(price)
+        final_price = models.ExpressionWrapper(
+            fields.get('qty', models.F('qty')) * fields.get('price', models.F('price')),
+            output_field=models.DecimalField(max_digits=9, decimal_places=2)
+        )
+        return self.update(final_price=final_price, **fields)
+
+    def for_open_carts(self, product):
+        return self.filter(
+            content_type=ContentType.objects.get_for_model(product),
+            object_id=product.pk,
+            related_cart__in_order=False
+        )
+
 
 class CartProduct(models.Model):
     user = models.ForeignKey('Customer', verbose_name="Покупатель", on_delete=models.CASCADE, related_name="related_users")
@@ -128,27 +235,74 @@ class CartProduct(models.Model):
     object_id = models.PositiveIntegerField()
     content_object = GenericForeignKey('content_type', 'object_id')
     qty = models.PositiveIntegerField(default=1)
+    price = models.DecimalField(max_digits=9, decimal_places=2, verbose_name="Цена", null=True, blank=True)
     final_price = models.DecimalField(max_digits=9, decimal_places=2, verbose_name="Общая цена")
+    objects = CartProductQuerySet.as_manager()
 
     def __str__(self):
         return "Продукт: {} (для корзины)".format(self.content_object.title)
 
     def save(self, *args, **kwargs):
-        self.final_price = self.qty * self.content_object.price
+        if self.price is None:
+            self.price = self.content_object.price
+        self.final_price = self.qty * self.price
         super().save(*args, **kwargs)
 
+    @classmethod
+    def recompute_cart(cls, cart):
+        cart_products = list(cart.products.select_related('content_type'))
+        ids_by_content_type = {}
+        for cart_product in cart_products:
+            ids_by_content_type.setdefault(cart_product.content_type, []).append(cart_product.object_id)
+        products_by_content_type = {
+            content_type: content_type.model_class()._base_manager.only('price').in_bulk(ids)
+            for content_type, ids in ids_by_content_type.items()
+        }
+        priced, missing = [], []
+        for cart_product in cart_products:
+            product = products_by_content_type[cart_product.content_type].get(cart_product.object_id)
+            if product is None:
+                missing.append(cart_product.pk)
+                continue
+            if cart_product.price != product.price:
+                cart_product.price = product.price
+                cart_product.final_price = cart_product.qty * cart_product.price
+                priced.append(cart_product)
+        if missing:
+            cls.objects.filter(pk__in=missing).delete()
+        if priced:
+            cls.objects.bulk_update(priced, ['price', 'final_price'])
+        return bool(priced or missing)
+
     class Meta:
         verbose_name = "Корзина товара"
         verbose_name_plural = "Корзина товара"
+        indexes = [
+            models.Index(fields=['content_type', 'object_id']),
+            models.Index(fields=['cart', 'user']),
+        ]
+
+
+class CartQuerySet(models.QuerySet):
+
+    # Cart.products is what the views and the admin maintain and what the cart page lists,
+    # so totals are aggregated over it rather than over the CartProduct.cart back-reference
+    def with_totals(self):
+        return self.annotate(
+            total_products=models.Count('products'),
+            final_price=Coalesce(
+                models.Sum('products__final_price'), models.Value(0),
+                output_field=models.DecimalField(max_digits=9, decimal_places=2)
+            )
+        )
 
 
 class Cart(models.Model):
     owner = models.ForeignKey('Customer', null=True, verbose_name="Владелец", on_delete=models.CASCADE)
     products = models.ManyToManyField(CartProduct, blank=True, related_name="related_cart")
-    total_products = models.PositiveIntegerField(default=0)
-    final_price = models.DecimalField(max_digits=9, default=0, decimal_places=2, verbose_name="Общая цена")
     in_order = models.BooleanField(default=False)
     for_anonymous_user = models.BooleanField(default=False)
+    objects = CartQuerySet.as_manager()
 
     def __str__(self):
         return str(self.id)
@@ -158,11 +312,31 @@ class Cart(models.Model):
         verbose_name_plural = "Корзина"
 
 
+class CustomerQuerySet(models.QuerySet):
+
+    def with_active_cart(self):
+        return self.annotate(has_active_cart=models.Exists(
+            CartProduct.objects.filter(related_cart__owner=models.OuterRef('pk'), related_cart__in_order=False)
+        ))
+
+    def with_recent_orders(self, days=30):
+        # Order.created_at is auto_now, so orders edited within ``days`` count as recent too
+        cutoff = timezone.now() - timedelta(days=days)
+        return self.prefetch_related(models.Prefetch(
+            'orders',
+            queryset=Order.objects.filter(created_at__gte=cutoff).only(
+                'id', 'status', 'created_at', 'order_date', 'cart'
+            ).select_related('cart'),
+            to_attr='recent_orders'
+        ))
+
+
 class Customer(models.Model):
     user = models.ForeignKey(User, verbose_name="Пользователь", on_delete=models.CASCADE)
     phone = models.CharField(max_length=20, verbose_name="Номер телефона", null=True, blank=True)
     address = models.CharField(max_length=255, verbose_name="Адрес", null=True, blank=True)
     orders = models.ManyToManyField('Order', verbose_name="Заказы покупателя", related_name="related_customer")
+    objects = CustomerQuerySet.as_manager()
 
     def __str__(self):
         return "Покупатель: {} {}".format(self.user.first_name, self.user.last_name)
@@ -225,6 +399,28 @@ class Notebook(Product):
     ram = models.CharField(max_length=255, verbose_name="Оперативная память", blank=True)
     video = models.CharField(max_length=255, verbose_name="Видеокарта", blank=True)
     time_without_charge = models.CharField(max_length=255, verbose_name="Время работы аккумулятора", blank=True)
+    diagonal_inch = models.DecimalField(
+        max_digits=4, decimal_places=1, null=True, editable=False, verbose_name="Диагональ (дюймы)"
+    )
+    processor_freq_ghz = models.DecimalField(
+        max_digits=4, decimal_places=2, null=True, editable=False, verbose_name="Частота процессора (ГГц)"
+    )
+    ram_gb = models.PositiveSmallIntegerField(null=True, editable=False, verbose_name="Оперативная память (ГБ)")
+
+    NUMERIC_SPEC_FIELDS = {
+        'diagonal_inch': ('diagonal', INCH_UNITS),
+        'processor_freq_ghz': ('processor_freq', GIGAHERTZ_UNITS),
+        'ram_gb': ('ram', GIGABYTE_UNITS),
+    }
+
+    SPEC = (
+        ('Диагональ', 'diagonal'),
+        ('Тип дисплея', 'display_type'),
+        ('Частота процессора', 'processor_freq'),
+        ('Оперативная память', 'ram'),
+        ('Видеокарта', 'video'),
+        ('Время работы аккумулятора', 'time_without_charge'),
+    )
 
     def __str__(self):
         return "{} : {}".format(self.category.name, self.title)
@@ -235,6 +431,10 @@ class Notebook(Product):
     class Meta:
         verbose_name = "Ноутбук"
         verbose_name_plural = "Ноутбуки"
+        indexes = [
+            models.Index(fields=['category', '-id']),
+            models.Index(fields=['ram_gb']),
+        ]
 
 
 class Smartphone(Product):
@@ -249,6 +449,39 @@ class Smartphone(Product):
     )
     main_cam = models.CharField(max_length=255, verbose_name="Передняя камера", blank=True)
     front_cam = models.CharField(max_length=255, verbose_name="Фронтальная камера", blank=True)
+    diagonal_inch = models.DecimalField(
+        max_digits=4, decimal_places=1, null=True, editable=False, verbose_name="Диагональ (дюймы)"
+    )
+    accum_volume_mah = models.PositiveIntegerField(null=True, editable=False, verbose_name="Объем батареи (мАч)")
+    ram_gb = models.PositiveSmallIntegerField(null=True, editable=False, verbose_name="Оперативная память (ГБ)")
+    sd_volume_gb = models.PositiveIntegerField(
+        null=True, editable=False, verbose_name="Макс. объём встраиваемой памяти (ГБ)"
+    )
+    main_cam_mp = models.PositiveSmallIntegerField(null=True, editable=False, verbose_name="Передняя камера (МП)")
+    front_cam_mp = models.PositiveSmallIntegerField(
+        null=True, editable=False, verbose_name="Фронтальная камера (МП)"
+    )
+
+    NUMERIC_SPEC_FIELDS = {
+        'diagonal_inch': ('diagonal', INCH_UNITS),
+        'accum_volume_mah': ('accum_volume', MILLIAMPERE_HOUR_UNITS),
+        'ram_gb': ('ram', GIGABYTE_UNITS),
+        'sd_volume_gb': ('sd_volume', GIGABYTE_UNITS),
+        'main_cam_mp': ('main_cam', MEGAPIXEL_UNITS),
+        'front_cam_mp': ('front_cam', MEGAPIXEL_UNITS),
+    }
+
+    SPEC = (
+        ('Диагональ', 'diagonal'),
+        ('Тип дисплея', 'display_type'),
+        ('Разрешение экрана', 'resolution'),
+        ('Объем батареи', 'accum_volume'),
+        ('Оперативная память', 'ram'),
+        ('SD карта', 'sd'),
+        ('Макс. объём встраиваемой памяти', 'sd_volume'),
+        ('Камера (МП)', 'main_cam'),
+        ('Фронтальная камера (МП)', 'front_cam'),
+    )
 
     def __str__(self):
         return "{} : {}".format(self.category.name, self.title)
@@ -256,9 +489,18 @@ class Smartphone(Product):
     def get_absolute_url(self):
         return get_product_url(self, 'product_detail')
 
+    def get_spec_rows(self, exclude=()):
+        if not self.sd:
+            exclude = (*exclude, 'sd_volume')
+        return super().get_spec_rows(exclude)
+
     class Meta:
         verbose_name = "Смартфон"
         verbose_name_plural = "Смартфоны"
+        indexes = [
+            models.Index(fields=['category', '-id']),
+            models.Index(fields=['ram_gb']),
+        ]
 
 
 
@@ -0,0 +1,33 @@
+from django.core.signals import setting_changed
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .models import CartProduct, Category, Notebook, Smartphone, get_product_url_template
+
+
+@receiver(post_save, sender=Category)
+@receiver(post_save, sender=Notebook)
+@receiver(post_save, sender=Smartphone)
+@receiver(post_delete, sender=Category)
+@receiver(post_delete, sender=Notebook)
+@receiver(post_delete, sender=Smartphone)
+def invalidate_left_sidebar(sender, **kwargs):
+    Category.objects.invalidate_left_sidebar()
+
+
+@receiver(post_save, sender=Notebook)
+@receiver(post_save, sender=Smartphone)
+def refresh_cart_product_prices(sender, instance, **kwargs):
+    CartProduct.objects.for_open_carts(instance).update_final_prices(price=instance.price)
+
+
+@receiver(post_delete, sender=Notebook)
+@receiver(post_delete, sender=Smartphone)
+def delete_cart_products(sender, instance, **kwargs):
+    CartProduct.objects.for_open_carts(instance).delete()
+
+
+@receiver(setting_changed)
+def clear_product_url_templates(setting, **kwargs):
+    if setting in ('ROOT_URLCONF', 'FORCE_SCRIPT_NAME'):
+        get_product_url_template.cache_clear()
@@ -1,4 +1,323 @@
-from django.test import TestCase
+from datetime import timedelta
+from decimal import Decimal
+from io import BytesIO
+from unittest import mock
 
-# Create your tests here.
+from PIL import Image
+from django.contrib.auth import get_user_model
+from django.contrib.contenttypes.models import ContentType
+from django.core.exceptions import ValidationError
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import connection
+from django.db.models import Count
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext, isolate_apps
+from django.urls import clear_script_prefix, set_script_prefix
+from django.utils import timezone
+from rest_framework import serializers
+from rest_framework.test import APIRequestFactory
 
+from .api.api_views import NotebookListAPIView
+from .api.serializers import NotebookSerializer
+from .models import (
+    Cart, CartProduct, Category, Customer, Notebook, Order, Smartphone, build_product_url,
+    get_product_url_template, validate_image_resolution
+)
+from .utils import (
+    GIGABYTE_UNITS, GIGAHERTZ_UNITS, INCH_UNITS, MEGAPIXEL_UNITS, MILLIAMPERE_HOUR_UNITS,
+    parse_number, to_field_value
+)
+
+
+class CartProductPriceTests(TestCase):
+
+    def setUp(self):
+        user = get_user_model().objects.create_user('customer', password='password')
+        self.client.force_login(user)
+        self.customer = Customer.objects.create(user=user)
+        self.cart = Cart.objects.create(owner=self.customer)
+        category = Category.objects.create(name='Ноутбуки', slug='notebooks')
+        self.notebook = Notebook.objects.create(
+            category=category, title='Notebook', slug='notebook', image='notebook.png', price=101
+        )
+        self.cart_product = CartProduct.objects.create(
+            user=self.customer, cart=self.cart,
+            content_type=ContentType.objects.get_for_model(Notebook), object_id=self.notebook.pk
+        )
+        self.cart.products.add(self.cart_product)
+
+    def test_price_change_reaches_open_cart(self):
+        self.notebook.price = 999
+        self.notebook.save()
+        self.client.post('/change-qty/notebook/notebook/', {'qty': 2})
+        self.cart_product.refresh_from_db()
+        self.assertEqual(self.cart_product.price, Decimal('999'))
+        self.assertEqual(self.cart_product.final_price, Decimal('1998'))
+
+    def test_update_final_prices_with_qty_and_price(self):
+        CartProduct.objects.filter(pk=self.cart_product.pk).update_final_prices(qty=3, price=Decimal('10.50'))
+        self.cart_product.refresh_from_db()
+        self.assertEqual((self.cart_product.qty, self.cart_product.price), (3, Decimal('10.50')))
+        self.assertEqual(self.cart_product.final_price, Decimal('31.50'))
+
+    def test_change_qty_reports_missing_item(self):
+        self.cart_product.delete()
+        response = self.client.post('/change-qty/notebook/notebook/', {'qty': 2}, follow=True)
+        self.assertEqual([str(message) for message in response.context['messages']], ['Товар не найден в корзине'])
+
+    def test_price_change_keeps_ordered_cart(self):
+        Cart.objects.filter(pk=self.cart.pk).update(in_order=True)
+        self.notebook.price = 999
+        self.notebook.save()
+        self.cart_product.refresh_from_db()
+        self.assertEqual(self.cart_product.price, Decimal('101'))
+
+    def test_deleted_product_leaves_open_cart(self):
+        self.notebook.delete()
+        self.assertFalse(CartProduct.objects.filter(pk=self.cart_product.pk).exists())
+
+    def test_cart_page_does_not_write(self):
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get('/cart/')
+        self.assertFalse([query for query in queries if query['sql'].startswith('UPDATE')])
+
+    def test_recompute_cart_skips_unchanged_prices(self):
+        with self.assertNumQueries(2):
+            self.assertFalse(CartProduct.recompute_cart(self.cart))
+
+    def test_order_recomputes_prices(self):
+        Notebook.objects.filter(pk=self.notebook.pk).update(price=500)
+        self.client.post('/make-order/', {
+            'first_name': 'Имя', 'last_name': 'Фамилия', 'phone': '123',
+            'buying_type': 'self', 'order_date': '2026-10-15'
+        })
+        self.cart_product.refresh_from_db()
+        self.assertEqual(self.cart_product.final_price, Decimal('500'))
+        self.assertTrue(Cart.objects.get(pk=self.cart.pk).in_order)
+
+    def test_recompute_cart_drops_missing_products(self):
+        missing = CartProduct.objects.create(
+            user=self.customer, cart=self.cart, content_type=self.cart_product.content_type,
+            object_id=self.notebook.pk + 1, price=0
+        )
+        self.cart.products.add(missing)
+        CartProduct.recompute_cart(self.cart)
+        self.assertEqual(list(self.cart.products.all()), [self.cart_product])
+
+    def test_totals_follow_listed_products(self):
+        other_cart = Cart.objects.create(owner=self.customer, in_order=True)
+        other_cart.products.add(self.cart_product)
+        self.cart.products.remove(self.cart_product)
+        response = self.client.get('/cart/')
+        self.assertEqual(list(response.context['cart_products']), [])
+        self.assertEqual((response.context['cart'].total_products, response.context['cart'].final_price), (0, 0))
+        other_cart = Cart.objects.with_totals().get(pk=other_cart.pk)
+        self.assertEqual((other_cart.total_products, other_cart.final_price), (1, Decimal('101')))
+
+
+class RecentOrdersTests(TestCase):
+
+    def test_recent_orders_are_prefetched(self):
+        customer = Customer.objects.create(user=get_user_model().objects.create_user('customer'))
+        cart = Cart.objects.create(owner=customer, in_order=True)
+        old_order, new_order = [
+            Order.objects.create(customer=customer, first_name='Имя', last_name='Фамилия', phone='123', cart=cart)
+            for i in range(2)
+        ]
+        Order.objects.filter(pk=old_order.pk).update(created_at=timezone.now() - timedelta(days=31))
+        customer.orders.add(old_order, new_order)
+        with self.assertNumQueries(2):
+            customer = Customer.objects.with_recent_orders().get(pk=customer.pk)
+            self.assertEqual(customer.recent_orders, [new_order])
+            self.assertEqual(customer.recent_orders[0].cart, cart)
+
+
+class AnnotatedNotebookListAPIView(NotebookListAPIView):
+
+    def annotate_queryset(self, queryset):
+        return queryset.annotate(category_notebooks_count=Count('category__notebook'))
+
+
+class ProductPaginationTests(TestCase):
+
+    def setUp(self):
+        category = Category.objects.create(name='Ноутбуки', slug='notebooks')
+        for i in range(3):
+            Notebook.objects.create(category=category, title='Notebook', slug='notebook-%d' % i, price=100)
+
+    def test_count_ignores_annotations(self):
+        request = APIRequestFactory().get('/api/notebooks/', {'page_size': 2})
+        with CaptureQueriesContext(connection) as queries:
+            response = AnnotatedNotebookListAPIView.as_view()(request)
+        self.assertEqual(response.data['count'], 3)
+        self.assertEqual(len(response.data['results']), 2)
+        count_sql, page_sql = queries[0]['sql'], queries[1]['sql']
+        self.assertIn('COUNT(*)', count_sql)
+        self.assertNotIn('GROUP BY', count_sql)
+        self.assertIn('GROUP BY', page_sql)
+
+    def test_unpaginated_list_is_annotated(self):
+        request = APIRequestFactory().get('/api/notebooks/')
+        with CaptureQueriesContext(connection) as queries:
+            response = AnnotatedNotebookListAPIView.as_view()(request)
+        self.assertEqual(len(response.data), 3)
+        self.assertIn('GROUP BY', queries[0]['sql'])
+
+
+class CategoryNameNotebookSerializer(NotebookSerializer):
+
+    category_name = serializers.CharField(source='category.name')
+
+
+class CategoryNameNotebookListAPIView(NotebookListAPIView):
+
+    serializer_class = CategoryNameNotebookSerializer
+
+
+class SerializerRelatedQuerysetTests(TestCase):
+
+    def test_dotted_source_is_selected(self):
+        category = Category.objects.create(name='Ноутбуки', slug='notebooks')
+        for i in range(3):
+            Notebook.objects.create(category=category, title='Notebook', slug='notebook-%d' % i, price=100)
+        request = APIRequestFactory().get('/api/notebooks/')
+        with self.assertNumQueries(1):
+            response = CategoryNameNotebookListAPIView.as_view()(request)
+        self.assertEqual([item['category_name'] for item in response.data], ['Ноутбуки'] * 3)
+
+
+class ParseNumberTests(SimpleTestCase):
+
+    def test_number_next_to_unit(self):
+        self.assertEqual(parse_number('DDR4 8 ГБ', GIGABYTE_UNITS), Decimal('8'))
+        self.assertEqual(parse_number('Intel Core i5 2.4 GHz', GIGAHERTZ_UNITS), Decimal('2.4'))
+        self.assertEqual(parse_number('Экран 15,6"', INCH_UNITS), Decimal('15.6'))
+        self.assertEqual(parse_number('4000 mAh', MILLIAMPERE_HOUR_UNITS), Decimal('4000'))
+        self.assertEqual(parse_number('12МП', MEGAPIXEL_UNITS), Decimal('12'))
+
+    def test_units_are_converted(self):
+        self.assertEqual(parse_number('2400 МГц', GIGAHERTZ_UNITS), Decimal('2.4'))
+        self.assertEqual(parse_number('1 ТБ', GIGABYTE_UNITS), Decimal('1024'))
+
+    def test_bare_number_is_in_base_unit(self):
+        self.assertEqual(parse_number('128', GIGABYTE_UNITS), Decimal('128'))
+        self.assertEqual(parse_number(' 6,1 ', INCH_UNITS), Decimal('6.1'))
+
+    def test_missing_number(self):
+        self.assertIsNone(parse_number('', GIGABYTE_UNITS))
+        self.assertIsNone(parse_number(None, GIGABYTE_UNITS))
+        self.assertIsNone(parse_number('нет', GIGABYTE_UNITS))
+        self.assertIsNone(parse_number('DDR4', GIGABYTE_UNITS))
+
+    def test_value_must_fit_field(self):
+        processor_freq_ghz = Notebook._meta.get_field('processor_freq_ghz')
+        ram_gb = Notebook._meta.get_field('ram_gb')
+        self.assertEqual(to_field_value(processor_freq_ghz, Decimal('2.4')), Decimal('2.40'))
+        self.assertIsNone(to_field_value(processor_freq_ghz, Decimal('2400')))
+        self.assertEqual(to_field_value(ram_gb, Decimal('7.6')), 8)
+        self.assertIsNone(to_field_value(ram_gb, None))
+
+
+class NumericSpecTests(TestCase):
+
+    def setUp(self):
+        self.category = Category.objects.create(name='Ноутбуки', slug='notebooks')
+
+    def test_save_fills_numeric_specs(self):
+        notebook = Notebook.objects.create(
+            category=self.category, title='Notebook', slug='notebook', price=100,
+            diagonal='15.6"', processor_freq='2400 МГц', ram='DDR4 8 ГБ'
+        )
+        notebook.refresh_from_db()
+        self.assertEqual(notebook.diagonal_inch, Decimal('15.6'))
+        self.assertEqual(notebook.processor_freq_ghz, Decimal('2.40'))
+        self.assertEqual(notebook.ram_gb, 8)
+
+    def test_save_stores_null_for_values_out_of_range(self):
+        smartphone = Smartphone.objects.create(
+            category=self.category, title='Smartphone', slug='smartphone', price=100,
+            diagonal='1000 дюймов', sd_volume='1 ТБ', main_cam='108 МП'
+        )
+        smartphone.refresh_from_db()
+        self.assertIsNone(smartphone.diagonal_inch)
+        self.assertEqual(smartphone.sd_volume_gb, 1024)
+        self.assertEqual(smartphone.main_cam_mp, 108)
+
+
+def make_image(width, height):
+    content = BytesIO()
+    Image.new('RGB', (width, height)).save(content, 'PNG')
+    return SimpleUploadedFile('image.png', content.getvalue(), content_type='image/png')
+
+
+class ImageValidationTests(SimpleTestCase):
+
+    def test_valid_upload(self):
+        validate_image_resolution(make_image(400, 400))
+        validate_image_resolution(Notebook(image=make_image(400, 400)).image)
+
+    def test_too_small_upload(self):
+        with self.assertRaisesMessage(ValidationError, 'Разрешение фото меньше минимального'):
+            validate_image_resolution(make_image(299, 400))
+        with self.assertRaisesMessage(ValidationError, 'Разрешение фото меньше минимального'):
+            validate_image_resolution(Notebook(image=make_image(400, 299)).image)
+
+    def test_too_large_upload(self):
+        with self.assertRaisesMessage(ValidationError, 'Разрешение фото больше максимального'):
+            validate_image_resolution(make_image(2501, 400))
+
+    def test_oversize_upload(self):
+        upload = SimpleUploadedFile('image.png', b'0' * (Notebook.MAX_IMAGE_SIZE + 1))
+        with self.assertRaisesMessage(ValidationError, 'Размер фото не должен превышать 3 МВ!'):
+            validate_image_resolution(upload)
+
+    def test_stored_image_is_not_reopened(self):
+        image = Notebook(image='missing.png').image
+        with mock.patch.object(image.storage, 'open') as storage_open:
+            validate_image_resolution(image)
+        storage_open.assert_not_called()
+
+
+class ProductUrlTests(SimpleTestCase):
+
+    def test_url_follows_script_prefix(self):
+        self.assertEqual(build_product_url('product_detail', 'notebook', 'slug'), '/products/notebook/slug/')
+        set_script_prefix('/shop/')
+        try:
+            self.assertEqual(build_product_url('product_detail', 'notebook', 'slug'), '/shop/products/notebook/slug/')
+        finally:
+            clear_script_prefix()
+        self.assertEqual(build_product_url('product_detail', 'notebook', 'slug'), '/products/notebook/slug/')
+
+    def test_url_settings_change_clears_cache(self):
+        build_product_url('product_detail', 'notebook', 'slug')
+        with override_settings(ROOT_URLCONF='shop.urls'):
+            self.assertEqual(get_product_url_template.cache_info().currsize, 0)
+
+
+class SpecRowsTests(SimpleTestCase):
+
+    def test_spec_rows_follow_spec(self):
+        notebook = Notebook(title='Notebook', diagonal='15.6"', ram='8 ГБ')
+        rows = dict(notebook.get_spec_rows())
+        self.assertEqual(len(rows), len(Notebook.SPEC))
+        self.assertEqual(rows['Диагональ'], '15.6"')
+
+    @isolate_apps('mainapp')
+    def test_subclass_spec_is_compiled(self):
+        class TitleSpecNotebook(Notebook):
+
+            SPEC = (
+                ('Название', 'title'),
+            )
+
+            class Meta:
+                proxy = True
+
+        self.assertEqual(TitleSpecNotebook(title='Notebook').get_spec_rows(), (('Название', 'Notebook'),))
+
+    def test_smartphone_without_sd_hides_sd_volume(self):
+        labels = [name for name, value in Smartphone(sd=False, sd_volume='128').get_spec_rows()]
+        self.assertNotIn('Макс. объём встраиваемой памяти', labels)
+        self.assertEqual(len(labels), len(Smartphone.SPEC) - 1)
+        self.assertEqual(len(Smartphone(sd=True).get_spec_rows()), len(Smartphone.SPEC))
@@ -1,11 +1,52 @@
+import re
+from decimal import Decimal, InvalidOperation, ROUND_HALF_UP
+
+from django.core.exceptions import ValidationError
 from django.db import models
 
 
-def recalc_cart(cart):
-    cart_data = cart.products.aggregate(models.Sum('final_price'), models.Count('id'))
-    if cart_data.get('final_price__sum'):
-        cart.final_price = cart_data['final_price__sum']
-    else:
-        cart.final_price = 0
-    cart.total_products = cart_data['id__count']
-    cart.save()
\ No newline at end of file
+GIGABYTE_UNITS = {'гб': 1, 'gb': 1, 'тб': 1024, 'tb': 1024}
+GIGAHERTZ_UNITS = {'ггц': 1, 'ghz': 1, 'мгц': Decimal('0.001'), 'mhz': Decimal('0.001')}
+INCH_UNITS = {'"': 1, '″': 1, 'дюйм': 1, 'inch': 1}
+MILLIAMPERE_HOUR_UNITS = {'мач': 1, 'mah': 1}
+MEGAPIXEL_UNITS = {'мп': 1, 'mp': 1}
+
+NUMBER = r'(?<![\d.,])(\d+(?:[.,]\d+)?)'
+BARE_NUMBER_RE = re.compile(r'\s*' + NUMBER + r'\s*$')
+
+
+def to_decimal(number):
+    return Decimal(number.replace(',', '.'))
+
+
+def parse_number(value, units):
+    """
+    Return the number written next to one of ``units``, converted with the unit's multiplier.
+    A value that is only a number is taken as already being in the base unit.
+    """
+    if not value:
+        return None
+    unit_pattern = '|'.join(re.escape(unit) for unit in sorted(units, key=len, reverse=True))
+    match = re.search(NUMBER + r'\s*(' + unit_pattern + ')', value, re.IGNORECASE)
+    if match is not None:
+        return to_decimal(match.group(1)) * units[match.group(2).lower()]
+    match = BARE_NUMBER_RE.match(value)
+    if match is not None:
+        return to_decimal(match.group(1))
+    return None
+
+
+def to_field_value(field, value):
+    """Convert a parsed number to the type of ``field``, or None when it does not fit the column."""
+    if value is None:
+        return None
+    try:
+        if isinstance(field, models.DecimalField):
+            value = value.quantize(Decimal(1).scaleb(-field.decimal_places))
+        else:
+            value = value.to_integral_value(ROUND_HALF_UP)
+        value = field.to_python(value)
+        field.run_validators(value)
+    except (InvalidOperation, ValidationError):
+        return None
+    return value
@@ -7,7 +7,6 @@ from django.views.generic import DetailView, View
 from .models import Notebook, Smartphone, Category, LatestProducts, Customer, Cart, CartProduct
 from .mixins import CategoryDetailMixin, CartMixin
 from .forms import OrderFrom
-from .utils import recalc_cart
 
 
 class BaseView(CartMixin, View):
@@ -73,7 +72,6 @@ class AddToCartView(CartMixin, View):
         )
         if created:
             self.cart.products.add(cart_product)
-        recalc_cart(self.cart)
         messages.add_message(request, messages.INFO, "Товар успешно добавлен")
         return HttpResponseRedirect('/cart/')
 
@@ -88,7 +86,6 @@ class DeleteFromCartView(CartMixin, View):
         )
         self.cart.products.remove(cart_product)
         cart_product.delete()
-        recalc_cart(self.cart)
         messages.add_message(request, messages.INFO, "Товар успешно удалён")
         return HttpResponseRedirect('/cart/')
 
@@ -99,14 +96,14 @@ class ChangeQTYView(CartMixin, View):
         ct_model, product_slug = kwargs.get('ct_model'), kwargs.get('slug')
         content_type = ContentType.objects.get(model=ct_model)
         product = content_type.model_class().objects.get(slug=product_slug)
-        cart_product = CartProduct.objects.get(
-            user=self.cart.owner, cart=self.cart, content_type=content_type, object_id=product.id
-        )
         qty = int(request.POST.get('qty'))
-        cart_product.qty = qty
-        cart_product.save()
-        recalc_cart(self.cart)
-        messages.add_message(request, messages.INFO, "Кол-во успешно изменено")
+        updated = CartProduct.objects.filter(
+            user=self.cart.owner, cart=self.cart, content_type=content_type, object_id=product.id
+        ).update_final_prices(qty=qty)
+        if updated:
+            messages.add_message(request, messages.INFO, "Кол-во успешно изменено")
+        else:
+            messages.add_message(request, messages.ERROR, "Товар не найден в корзине")
         return HttpResponseRedirect('/cart/')
 
 
@@ -116,6 +113,7 @@ class CartView(CartMixin, View):
         categories = Category.objects.get_categories_for_left_sidebar()
         context = {
             'cart': self.cart,
+            'cart_products': self.get_cart_products(),
             'categories': categories
         }
         return render(request, 'cart.html', context)
@@ -128,6 +126,7 @@ class CheckoutView(CartMixin, View):
         form = OrderFrom(request.POST or None)
         context = {
             'cart': self.cart,
+            'cart_products': self.get_cart_products(),
             'categories': categories,
             'form': form
         }
@@ -141,6 +140,7 @@ class MakeOrderView(CartMixin, View):
         form = OrderFrom(request.POST or None)
         customer = Customer.objects.get(user=request.user)
         if form.is_valid():
+            self.recompute_cart()
             new_order = form.save(commit=False)
             new_order.customer = customer
             new_order.first_name = form.cleaned_data['first_name']